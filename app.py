@@ -1,6 +1,18 @@
 import os
-from flask import Flask, request
-from src import reader
+import random
+import threading
+from time import perf_counter, time
+import numpy as np
+from flask import Flask, request, g
+from src import reader, decode
+from src.decode import DecodeHints
+from src.metrics import Registry, Counter, Gauge, Histogram, resident_memory
+from src.tracing import Trace, SamplingProfiler, queue_time
+from src.thread_budget import apply_thread_budget
+from src.template import TemplateIndex, TemplateReader
+
+# limit torch, OpenCV and tesseract threads before handling any request
+apply_thread_budget()
 
 app = Flask(__name__)
 
@@ -11,6 +23,146 @@ apiKey = (
 )
 
 
+# directory with template indexes built by `python -m src.template`
+templateIndexDir = os.environ.get("TEMPLATE_INDEX_DIR")
+
+
+def loadTemplateIndex(ocr_reader):
+    # load the template index built with the given reader, if there is one
+    if not templateIndexDir:
+        return None
+
+    path = os.path.join(templateIndexDir, f"{ocr_reader}.pickle")
+    if not os.path.exists(path):
+        return None
+
+    return TemplateIndex.load(path)
+
+
+templateIndexes = {
+    str(ocr_reader): loadTemplateIndex(ocr_reader)
+    for ocr_reader in [reader.TesseractReader(), reader.EasyOCRReader()]
+}
+
+
+def withTemplates(ocr_reader):
+    # read only the caption of known meme templates
+    index = templateIndexes[str(ocr_reader)]
+    if index is None:
+        return ocr_reader
+
+    return TemplateReader(ocr_reader, index)
+
+
+readers = {
+    "easyocr": withTemplates(reader.EasyOCRReader()),
+    "tesseract": withTemplates(reader.TesseractReader()),
+}
+
+
+def templateHitRatio():
+    # part of the images read using a template, per engine
+    ratios = {}
+    for engine, ocr_reader in readers.items():
+        if isinstance(ocr_reader, TemplateReader):
+            ratios[(("engine", engine),)] = ocr_reader.hit_ratio()
+
+    return ratios
+
+
+metrics = Registry()
+requestDuration = metrics.register(
+    Histogram("ocr_request_duration_seconds", "Duration of request stages")
+)
+requestCount = metrics.register(Counter("ocr_requests_total", "Handled requests"))
+inFlight = metrics.register(Gauge("ocr_requests_in_flight", "Requests being handled"))
+modelLoad = metrics.register(Gauge("ocr_model_load_seconds", "Model load time"))
+modelWarmup = metrics.register(Gauge("ocr_model_warmup_seconds", "First read time"))
+metrics.register(
+    Gauge("ocr_template_hit_ratio", "Part of images read using a template", templateHitRatio)
+)
+metrics.register(
+    Gauge("ocr_worker_resident_memory_bytes", "Worker RSS", resident_memory)
+)
+
+# load the models and run a first read before handling any request
+loadStart = perf_counter()
+reader.EasyOCRReader.load()
+modelLoad.set(perf_counter() - loadStart, engine="easyocr")
+
+for engineName, engineReader in readers.items():
+    # warm up the engine itself so the template hit ratio isn't affected
+    if isinstance(engineReader, TemplateReader):
+        engineReader = engineReader.reader
+
+    warmupStart = perf_counter()
+    engineReader.read(np.full((32, 32), 255, np.uint8))
+    modelWarmup.set(perf_counter() - warmupStart, engine=engineName)
+
+# part of the requests to capture a flame graph for, 0 disables profiling
+profileSampleRate = float(os.environ.get("PROFILE_SAMPLE_RATE") or 0)
+profileDir = os.environ.get("PROFILE_DIR") or "/tmp/profiles"
+
+
+@app.before_request
+def startTrace():
+    g.start = perf_counter()
+    g.trace = Trace()
+    g.engine = request.path.strip("/")
+
+    # only OCR requests, not metric scrapes or unknown paths
+    if g.engine in readers:
+        inFlight.inc()
+
+    # the proxy has to send X-Request-Start: t=<unix time> (e.g. nginx "t=${msec}")
+    queued = queue_time(request.headers.get("X-Request-Start"), time())
+    if queued is not None:
+        g.trace.add("queue", queued)
+
+    # only authorized requests may cause profiling and writing to disk
+    g.profiler = None
+    if (
+        g.engine in readers
+        and isAuthorized(request)
+        and random.random() < profileSampleRate
+    ):
+        g.profiler = SamplingProfiler(threading.get_ident())
+        g.profiler.start()
+
+
+@app.after_request
+def finishTrace(response):
+    if g.engine in readers:
+        g.trace.add("total", perf_counter() - g.start)
+
+        # rejected requests are cheap, keep them apart from the latency of handled ones
+        for span in g.trace.spans:
+            requestDuration.observe(
+                span.duration,
+                engine=g.engine,
+                stage=span.name,
+                status=response.status_code,
+            )
+
+        requestCount.inc(engine=g.engine, status=response.status_code)
+        response.headers["Server-Timing"] = g.trace.server_timing()
+
+    return response
+
+
+@app.teardown_request
+def teardownTrace(_):
+    if g.get("engine") in readers:
+        inFlight.dec()
+
+    profiler = g.get("profiler")
+    if profiler is not None:
+        profiler.stop()
+
+        os.makedirs(profileDir, exist_ok=True)
+        profiler.save(os.path.join(profileDir, f"{g.engine}-{os.urandom(8).hex()}.folded"))
+
+
 def isAuthorized(req):
     # check request authorization code
     key = req.headers.get("Authorization")
@@ -20,19 +172,51 @@ def isAuthorized(req):
         return False
 
 
+def readUploadFile(ocr_reader):
+    temp_file_name = f"/tmp/{os.urandom(16).hex()}.png"
+
+    with g.trace.span("receive"):
+        request.files["file"].save(temp_file_name)
+
+    # the engine decodes the file itself, so there is no decode stage
+    try:
+        with g.trace.span("ocr"):
+            return "\n".join(ocr_reader.read(temp_file_name))
+    finally:
+        os.remove(temp_file_name)
+
+
+def readUpload(ocr_reader):
+    # nothing can be saved by decoding the upload here, so let the engine decode it
+    # as it always did instead of decoding it here and encoding it again for the engine
+    if ocr_reader.decode_hints() == DecodeHints() and not isinstance(
+        ocr_reader, TemplateReader
+    ):
+        return readUploadFile(ocr_reader)
+
+    with g.trace.span("receive"):
+        data = request.files["file"].read()
+
+    # decode the upload in memory only in the color mode and size the reader needs
+    with g.trace.span("decode"):
+        image = decode.decode(data, ocr_reader.decode_hints())
+
+    with g.trace.span("ocr"):
+        return "\n".join(ocr_reader.read(image))
+
+
+@app.get("/metrics")
+def metricsEndpoint():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+
 @app.post("/easyocr")
 def easyocr():
     # check authorization
     if not isAuthorized(request):
         return "Unauthorized", 401
 
-    image_id = os.urandom(16).hex()
-    temp_file_name = f"/tmp/{image_id}.png"
-
-    file = request.files["file"]
-    file.save(temp_file_name)
-
-    return "\n".join(reader.EasyOCRReader().read(temp_file_name))
+    return readUpload(readers["easyocr"])
 
 
 @app.post("/tesseract")
@@ -41,10 +225,4 @@ def tesseract():
     if not isAuthorized(request):
         return "Unauthorized", 401
 
-    image_id = os.urandom(16).hex()
-    temp_file_name = f"/tmp/{image_id}.png"
-
-    file = request.files["file"]
-    file.save(temp_file_name)
-
-    return "\n".join(reader.TesseractReader().read(temp_file_name))
+    return readUpload(readers["tesseract"])
@@ -0,0 +1,157 @@
+"""module that decodes images only in the color mode and size the pipeline needs"""
+import struct
+from dataclasses import dataclass
+from multiprocessing import Pool
+from resource import getrusage, RUSAGE_SELF
+from typing import List, Optional, Tuple
+
+# pylint: disable=no-name-in-module
+from cv2 import (
+    Mat,
+    imdecode,
+    getTickCount,
+    getTickFrequency,
+    IMREAD_COLOR,
+    IMREAD_GRAYSCALE,
+    IMREAD_REDUCED_COLOR_2,
+    IMREAD_REDUCED_COLOR_4,
+    IMREAD_REDUCED_COLOR_8,
+    IMREAD_REDUCED_GRAYSCALE_2,
+    IMREAD_REDUCED_GRAYSCALE_4,
+    IMREAD_REDUCED_GRAYSCALE_8,
+)
+import numpy as np
+
+
+@dataclass(frozen=True)
+class DecodeHints:
+    """This class describes what the first step of a pipeline needs from the decoded image."""
+
+    grayscale: bool = False  # the image is converted to gray right away
+    min_side: Optional[int] = None  # the image is downscaled to this longer side right away
+
+
+# reduced decode modes by scale factor, largest first
+REDUCED_MODES = {
+    False: [(8, IMREAD_REDUCED_COLOR_8), (4, IMREAD_REDUCED_COLOR_4), (2, IMREAD_REDUCED_COLOR_2)],
+    True: [
+        (8, IMREAD_REDUCED_GRAYSCALE_8),
+        (4, IMREAD_REDUCED_GRAYSCALE_4),
+        (2, IMREAD_REDUCED_GRAYSCALE_2),
+    ],
+}
+
+# JPEG start of frame markers (all except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def pipeline_hints(reader, filters: list) -> DecodeHints:
+    """returns the decode hints of the first step of the pipeline,
+    which is the first filter or the reader if there are no filters"""
+    if filters:
+        return filters[0].decode_hints()
+
+    return reader.decode_hints()
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """returns (width, height) of a JPEG image by reading its header,
+    or None if data is not a JPEG"""
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+
+        marker = data[offset + 1]
+
+        # padding
+        if marker == 0xFF:
+            offset += 1
+            continue
+
+        (length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return width, height
+
+        offset += 2 + length
+
+    return None
+
+
+def decode_mode(data: bytes, hints: DecodeHints) -> int:
+    """returns the cheapest imdecode mode that still satisfies the hints"""
+    size = jpeg_size(data) if hints.min_side else None
+
+    # only JPEG can be decoded at reduced resolution (DCT scaling),
+    # other formats would be decoded at full resolution and resized anyway
+    if size is not None:
+        longer_side = max(size)
+        for scale, mode in REDUCED_MODES[hints.grayscale]:
+            if longer_side // scale >= hints.min_side:
+                return mode
+
+    return IMREAD_GRAYSCALE if hints.grayscale else IMREAD_COLOR
+
+
+def decode(data: bytes, hints: DecodeHints = DecodeHints()) -> Mat:
+    """decodes an encoded image in the color mode and size given by hints"""
+    return imdecode(np.frombuffer(data, np.uint8), decode_mode(data, hints))
+
+
+def read(path: str, hints: DecodeHints = DecodeHints()) -> Mat:
+    """reads an image from path in the color mode and size given by hints"""
+    with open(path, "rb") as file:
+        return decode(file.read(), hints)
+
+
+def _measure(paths: List[str], hints: DecodeHints) -> Tuple[float, int]:
+    """decodes every image in paths and returns the average decode time
+    in milliseconds and the growth of peak memory of this process in bytes"""
+    # ru_maxrss is in kilobytes on Linux
+    baseline = getrusage(RUSAGE_SELF).ru_maxrss
+
+    time = getTickCount()
+    for path in paths:
+        read(path, hints)
+    time = (getTickCount() - time) / getTickFrequency() * 1000
+
+    return time / len(paths), (getrusage(RUSAGE_SELF).ru_maxrss - baseline) * 1024
+
+
+def measure(paths: List[str], hints: DecodeHints) -> Tuple[float, int]:
+    """decodes every image in paths in a fresh process, so peak memory of other decodes
+    doesn't hide it, and returns the average decode time in milliseconds
+    and the growth of peak memory in bytes"""
+    with Pool(processes=1) as pool:
+        return pool.apply(_measure, (paths, hints))
+
+
+if __name__ == "__main__":
+    # pylint: disable=ungrouped-imports
+    import argparse
+    from src.dataset import Dataset
+    from src.filter import NoFilter
+
+    parser = argparse.ArgumentParser(
+        description="compare full decode with the decode the normalizing filters need"
+    )
+    parser.add_argument("--dataset", default="./memes")
+    parser.add_argument("--count", type=int, default=50)
+    args = parser.parse_args()
+
+    image_paths = [entry.image_path for entry in Dataset(args.dataset).get(args.count)]
+
+    for name, measured_hints in [
+        ("full", DecodeHints()),
+        ("pipeline", NoFilter().decode_hints()),
+    ]:
+        average_time, peak_memory = measure(image_paths, measured_hints)
+        print(
+            f"{name}: {average_time:.2f} ms per image, "
+            f"peak memory +{peak_memory / 2**20:.1f} MiB"
+        )
@@ -23,6 +23,10 @@ from cv2 import (
     dilate,
 )
 import numpy as np
+from src.decode import DecodeHints
+
+# longer side of the image after normalization
+NORMALIZE_SIZE = 600
 
 # abstract class for filters
 class Filter:
@@ -38,6 +42,11 @@ class Filter:
     def __str__(cls):
         """returns the name of the filter"""
 
+    def decode_hints(self) -> DecodeHints:
+        """returns what this filter needs from the decoded image,
+        by default a full resolution color image"""
+        return DecodeHints()
+
     def __json__(self):
         return str(self)
 
@@ -50,6 +59,10 @@ class NoFilter(Filter):
         """returns image without applying any filter"""
         return NormalizeFilter().filter(image)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray and downscaled right away"""
+        return DecodeHints(grayscale=True, min_side=NORMALIZE_SIZE)
+
     def __str__(self) -> str:
         return "no filter"
 
@@ -60,9 +73,17 @@ class GrayscaleFilter(Filter):
     # pylint: disable=arguments-differ
     def filter(self, image: Mat) -> Mat:
         """applies a grayscale filter on image"""
-        gray = cvtColor(image, COLOR_BGR2GRAY)
+        if len(image.shape) > 2:
+            gray = cvtColor(image, COLOR_BGR2GRAY)
+        else:
+            gray = image
+
         return NormalizeFilter().filter(gray)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray and downscaled right away"""
+        return DecodeHints(grayscale=True, min_side=NORMALIZE_SIZE)
+
     def __str__(self) -> str:
         return "grayscale"
 
@@ -82,6 +103,10 @@ class CannyEdgeFilter(Filter):
 
         return NormalizeFilter().filter(canny)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray right away"""
+        return DecodeHints(grayscale=True)
+
     def __str__(self) -> str:
         return "canny edge"
 
@@ -103,6 +128,10 @@ class CannyEdgeWithFilledShapesFilter(Filter):
 
         return NormalizeFilter().filter(canny)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray right away"""
+        return DecodeHints(grayscale=True)
+
     def __str__(self) -> str:
         return "canny edge with filled shapes"
 
@@ -124,6 +153,10 @@ class SharpenFilter(Filter):
 
         return NormalizeFilter().filter(sharpened)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray right away"""
+        return DecodeHints(grayscale=True)
+
     def __str__(self) -> str:
         return "sharpen"
 
@@ -143,6 +176,10 @@ class OneBitColorFilter(Filter):
 
         return NormalizeFilter().filter(result)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray right away"""
+        return DecodeHints(grayscale=True)
+
     def __str__(self) -> str:
         return "one bit color"
 
@@ -162,6 +199,10 @@ class GaussianBlurFilter(Filter):
 
         return NormalizeFilter().filter(blurred)
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray right away"""
+        return DecodeHints(grayscale=True)
+
     def __str__(self) -> str:
         return "gaussian blur"
 
@@ -207,14 +248,18 @@ class NormalizeFilter(Filter):
             gray = bitwise_not(gray)
 
         if gray.shape[0] > gray.shape[1]:
-            scale = 600 / gray.shape[0]
+            scale = NORMALIZE_SIZE / gray.shape[0]
         else:
-            scale = 600 / gray.shape[1]
+            scale = NORMALIZE_SIZE / gray.shape[1]
 
         gray = resize(gray, (0, 0), fx=scale, fy=scale)
 
         return gray
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray and downscaled right away"""
+        return DecodeHints(grayscale=True, min_side=NORMALIZE_SIZE)
+
     def __str__(self) -> str:
         return "normalize"
 
@@ -264,5 +309,9 @@ class Custom(Filter):
 
         return gray
 
+    def decode_hints(self) -> DecodeHints:
+        """the image is converted to gray and downscaled right away"""
+        return DecodeHints(grayscale=True, min_side=NORMALIZE_SIZE)
+
     def __str__(self) -> str:
         return "Custom"
@@ -0,0 +1,184 @@
+"""module that collects server metrics and renders them in the Prometheus text format"""
+import os
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+# latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def escape_label_value(value: str) -> str:
+    """escapes backslashes, quotes and newlines in a label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """formats labels as {name="value",...}"""
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        f'{name}="{escape_label_value(str(value))}"'
+        for name, value in sorted(labels.items())
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """This class is the abstract class for metrics."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.lock = Lock()
+
+    def samples(self) -> List[str]:
+        """returns the sample lines of the metric"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """returns the metric in the Prometheus text format"""
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ] + self.samples()
+
+
+class Counter(Metric):
+    """counter that only goes up"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        """increases the counter with labels by value"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            return [
+                f"{self.name}{format_labels(dict(key))} {value}"
+                for key, value in self.values.items()
+            ]
+
+
+class Gauge(Metric):
+    """gauge that can go up and down or is computed by collect when rendered"""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        collect: Optional[Callable[[], Dict[Tuple, float]]] = None,
+    ):
+        super().__init__(name, help_text)
+        self.values: Dict[Tuple, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        """sets the gauge with labels to value"""
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def inc(self, value: float = 1, **labels):
+        """increases the gauge with labels by value"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels):
+        """decreases the gauge with labels by value"""
+        self.inc(-value, **labels)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            values = dict(self.values)
+
+        if self.collect is not None:
+            values.update(self.collect())
+
+        return [
+            f"{self.name}{format_labels(dict(key))} {value}"
+            for key, value in values.items()
+        ]
+
+
+class Histogram(Metric):
+    """histogram of observed values with cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = buckets
+        # labels -> (bucket counts, sum, count)
+        self.values: Dict[Tuple, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        """adds value to the histogram with labels"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0, 0))
+
+            for i, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    counts[i] += 1
+
+            self.values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self.lock:
+            for key, (counts, total, count) in self.values.items():
+                labels = dict(key)
+
+                for bucket, bucket_count in zip(self.buckets, counts):
+                    bucket_labels = format_labels({**labels, "le": str(bucket)})
+                    lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+
+                inf_labels = format_labels({**labels, "le": "+Inf"})
+                lines.append(f"{self.name}_bucket{inf_labels} {count}")
+                lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+
+        return lines
+
+
+class Registry:
+    """This class contains all metrics of the server."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """adds metric to the registry and returns it"""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """returns all metrics in the Prometheus text format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory() -> Dict[Tuple, float]:
+    """returns the resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return {}
+
+    return {(): pages * os.sysconf("SC_PAGE_SIZE")}
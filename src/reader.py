@@ -2,12 +2,25 @@
 the implementations for tesseract and easyocr"""
 
 from abc import abstractmethod
+from dataclasses import dataclass
 from typing import List
 import pytesseract
 import easyocr
 
 # pylint: disable=no-name-in-module
-from cv2 import Mat
+from cv2 import Mat, cvtColor, COLOR_BGR2RGB
+from src.decode import DecodeHints
+
+
+@dataclass
+class TextBox:
+    """This class contains a single line of text and its bounding box in the image."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    text: str
 
 
 class OCRReader:
@@ -17,12 +30,21 @@ class OCRReader:
     def read(self, image: Mat) -> List[str]:
         """reads text from image and returns the result as a list of strings separated by line"""
 
+    @abstractmethod
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """reads text from image and returns the lines together with their bounding boxes"""
+
     # pylint: disable=line-too-long
     # @see https://pyimagesearch.com/2020/09/14/getting-started-with-easyocr-for-optical-character-recognition/
     def cleanup_text(self, text: str):
         """cleans up the text by removing non-ascii characters"""
         return "".join([c if ord(c) < 128 else "" for c in text]).strip()
 
+    def decode_hints(self) -> DecodeHints:
+        """returns what this reader needs from the decoded image,
+        by default a full resolution color image"""
+        return DecodeHints()
+
     @abstractmethod
     def __str__(self):
         raise NotImplementedError
@@ -34,9 +56,45 @@ class OCRReader:
 class TesseractReader(OCRReader):
     """This class is the implementation for tesseract"""
 
+    def to_rgb(self, image: Mat) -> Mat:
+        """pytesseract treats arrays as RGB, while OpenCV decodes to BGR"""
+        if not isinstance(image, str) and len(image.shape) == 3 and image.shape[2] == 3:
+            return cvtColor(image, COLOR_BGR2RGB)
+
+        return image
+
     def read(self, image: Mat) -> List[str]:
         """reads text from image and returns the result as a list of strings separated by line"""
-        return self.cleanup_text(pytesseract.image_to_string(image)).splitlines()
+        text = pytesseract.image_to_string(self.to_rgb(image))
+        return self.cleanup_text(text).splitlines()
+
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """reads text from image and returns the lines together with their bounding boxes"""
+        data = pytesseract.image_to_data(
+            self.to_rgb(image), output_type=pytesseract.Output.DICT
+        )
+
+        # group words by the line they belong to
+        lines = {}
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(i)
+
+        boxes: List[TextBox] = []
+        for words in lines.values():
+            left = min(data["left"][i] for i in words)
+            top = min(data["top"][i] for i in words)
+            right = max(data["left"][i] + data["width"][i] for i in words)
+            bottom = max(data["top"][i] + data["height"][i] for i in words)
+            text = self.cleanup_text(" ".join(data["text"][i] for i in words))
+
+            if text:
+                boxes.append(TextBox(left, top, right - left, bottom - top, text))
+
+        return boxes
 
     def __str__(self):
         return "tesseract"
@@ -45,12 +103,44 @@ class TesseractReader(OCRReader):
 class EasyOCRReader(OCRReader):
     """This class is the implementation for easyocr"""
 
+    # the model is loaded once per process and shared by all readers
+    model = None
+
+    @classmethod
+    def load(cls) -> easyocr.Reader:
+        """loads the model if not already loaded and returns it"""
+        if cls.model is None:
+            cls.model = easyocr.Reader(["en"])
+
+        return cls.model
+
     def read(self, image: Mat) -> List[str]:
         """reads text from image and returns the result as a list of strings separated by line"""
 
-        reader = easyocr.Reader(["en"])
-        result = reader.readtext(image)
+        result = self.load().readtext(image)
         return [self.cleanup_text(text) for (bbox, text, prob) in result]
 
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """reads text from image and returns the lines together with their bounding boxes"""
+
+        result = self.load().readtext(image)
+
+        boxes: List[TextBox] = []
+        # pylint: disable=unused-variable
+        for (bbox, text, prob) in result:
+            xs = [int(point[0]) for point in bbox]
+            ys = [int(point[1]) for point in bbox]
+            boxes.append(
+                TextBox(
+                    min(xs),
+                    min(ys),
+                    max(xs) - min(xs),
+                    max(ys) - min(ys),
+                    self.cleanup_text(text),
+                )
+            )
+
+        return boxes
+
     def __str__(self):
         return "easyocr"
@@ -0,0 +1,364 @@
+"""module that recognizes known meme templates and OCRs only the caption
+regions that differ from the template"""
+import os
+from dataclasses import dataclass
+from threading import Lock
+from pickle import dump, load
+from typing import List, Optional, Tuple
+
+# pylint: disable=no-name-in-module
+from cv2 import (
+    Mat,
+    cvtColor,
+    COLOR_BGR2GRAY,
+    resize,
+    INTER_AREA,
+    absdiff,
+    threshold,
+    THRESH_BINARY,
+    dilate,
+    connectedComponentsWithStats,
+    CC_STAT_LEFT,
+    CC_STAT_TOP,
+    CC_STAT_WIDTH,
+    CC_STAT_HEIGHT,
+)
+import numpy as np
+from src import decode
+from src.decode import DecodeHints
+from src.filter import NORMALIZE_SIZE
+from src.reader import OCRReader, TextBox
+
+# maximum number of differing hash bits for an image to match a template
+MAX_HASH_DISTANCE = 12
+# maximum relative difference of aspect ratios for an image to match a template
+MAX_ASPECT_DIFFERENCE = 0.05
+# pixels differing by more than this are considered changed
+DIFF_THRESHOLD = 40
+# changed pixels closer than this (in normalized pixels) belong to the same region
+REGION_GAP = 15
+# regions with fewer changed pixels than this are compression noise
+MIN_CHANGED_PIXELS = 50
+# if more than this part of the image changed, it is read as a whole
+MAX_CHANGED_RATIO = 0.5
+
+# (x, y, width, height)
+Box = Tuple[int, int, int, int]
+
+
+def to_gray(image: Mat) -> Mat:
+    """converts image to grayscale if not already"""
+    if len(image.shape) > 2:
+        return cvtColor(image, COLOR_BGR2GRAY)
+
+    return image
+
+
+def normalize(gray: Mat) -> Mat:
+    """resizes gray image to NORMALIZE_SIZE pixels in width or height"""
+    scale = NORMALIZE_SIZE / max(gray.shape)
+    return resize(gray, (0, 0), fx=scale, fy=scale, interpolation=INTER_AREA)
+
+
+def difference_hash(gray: Mat) -> np.ndarray:
+    """returns the 64 bit perceptual difference hash of gray image as 8 bytes"""
+    small = resize(gray, (9, 8), interpolation=INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1])
+
+
+def intersects(first: Box, second: Box) -> bool:
+    """returns True if the boxes overlap"""
+    return (
+        first[0] < second[0] + second[2]
+        and second[0] < first[0] + first[2]
+        and first[1] < second[1] + second[3]
+        and second[1] < first[1] + first[3]
+    )
+
+
+def contains(outer: Box, inner: Box) -> bool:
+    """returns True if inner lies completely inside outer"""
+    return (
+        outer[0] <= inner[0]
+        and outer[1] <= inner[1]
+        and inner[0] + inner[2] <= outer[0] + outer[2]
+        and inner[1] + inner[3] <= outer[1] + outer[3]
+    )
+
+
+def union(first: Box, second: Box) -> Box:
+    """returns the smallest box containing both boxes"""
+    left = min(first[0], second[0])
+    top = min(first[1], second[1])
+    right = max(first[0] + first[2], second[0] + second[2])
+    bottom = max(first[1] + first[3], second[1] + second[3])
+    return left, top, right - left, bottom - top
+
+
+def merge_boxes(boxes: List[Box]) -> List[Box]:
+    """merges overlapping boxes until no two boxes overlap"""
+    merged: List[Box] = []
+    for box in boxes:
+        # merging can make the box overlap boxes it didn't overlap before
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if intersects(box, other):
+                    merged.remove(other)
+                    box = union(box, other)
+                    changed = True
+                    break
+
+        merged.append(box)
+
+    return merged
+
+
+@dataclass
+class Template:
+    """This class contains a single known meme template."""
+
+    template_id: str
+    image_hash: np.ndarray
+    aspect_ratio: float  # width / height
+    gray: Mat  # normalized grayscale template
+    boxes: List[TextBox]  # text of the template in normalized coordinates
+
+
+class TemplateIndex:
+    """
+    Index of known meme templates, which can be built offline from a directory of images.
+    """
+
+    def __init__(self, templates: List[Template]):
+        self.templates = templates
+        self.hashes = np.array([template.image_hash for template in templates], np.uint8)
+
+    @staticmethod
+    def build(path: str, reader: OCRReader) -> "TemplateIndex":
+        """builds the index from all "png" or "jpg" images in path"""
+        files = sorted(
+            file
+            for file in os.listdir(path)
+            if file.endswith(".png") or file.endswith(".jpg")
+        )
+
+        templates: List[Template] = []
+        for file in files:
+            image = decode.read(
+                os.path.join(path, file),
+                DecodeHints(grayscale=True, min_side=NORMALIZE_SIZE),
+            )
+            gray = normalize(image)
+
+            templates.append(
+                Template(
+                    file.split(".")[0],
+                    difference_hash(gray),
+                    image.shape[1] / image.shape[0],
+                    gray,
+                    reader.read_boxes(gray),
+                )
+            )
+
+        return TemplateIndex(templates)
+
+    def save(self, path: str):
+        """saves the index to path"""
+        with open(path, "wb") as file:
+            dump(self.templates, file)
+
+    @staticmethod
+    def load(path: str) -> "TemplateIndex":
+        """loads the index from path"""
+        with open(path, "rb") as file:
+            return TemplateIndex(load(file))
+
+    def match(self, gray: Mat) -> Optional[Template]:
+        """returns the template closest to normalized gray image, or None if none is close"""
+        if not self.templates:
+            return None
+
+        image_hash = difference_hash(gray)
+        distances = np.unpackbits(self.hashes ^ image_hash, axis=1).sum(axis=1)
+
+        aspect_ratio = gray.shape[1] / gray.shape[0]
+
+        # try templates from the closest
+        for i in np.argsort(distances):
+            if distances[i] > MAX_HASH_DISTANCE:
+                return None
+
+            template = self.templates[i]
+            if abs(template.aspect_ratio - aspect_ratio) / template.aspect_ratio <= (
+                MAX_ASPECT_DIFFERENCE
+            ):
+                return template
+
+        return None
+
+
+def changed_regions(template: Template, gray: Mat) -> List[Box]:
+    """returns the regions (in normalized template coordinates) where gray
+    differs from the template, grown to contain every template line they touch"""
+    height, width = template.gray.shape
+    gray = resize(gray, (width, height), interpolation=INTER_AREA)
+
+    changed = threshold(absdiff(gray, template.gray), DIFF_THRESHOLD, 255, THRESH_BINARY)[1]
+
+    # group changed pixels that are close to each other into regions
+    grouped = dilate(changed, np.ones((REGION_GAP, REGION_GAP), np.uint8))
+    count, labels, stats, _ = connectedComponentsWithStats(grouped)
+
+    # count the changed pixels of every region before it was grown by dilation
+    changed_pixels = np.bincount(labels[changed > 0], minlength=count)
+
+    # label 0 is the unchanged background
+    regions = [
+        (
+            int(stats[label, CC_STAT_LEFT]),
+            int(stats[label, CC_STAT_TOP]),
+            int(stats[label, CC_STAT_WIDTH]),
+            int(stats[label, CC_STAT_HEIGHT]),
+        )
+        for label in range(1, count)
+        if changed_pixels[label] >= MIN_CHANGED_PIXELS
+    ]
+
+    if not regions:
+        return []
+
+    # a changed line has to be read as a whole, and growing a region to contain
+    # a line can make it touch other lines, so grow until no line is cut
+    template_boxes = [(box.x, box.y, box.width, box.height) for box in template.boxes]
+    regions = merge_boxes(regions)
+    while True:
+        cut = [
+            box
+            for box in template_boxes
+            if any(intersects(box, region) and not contains(region, box) for region in regions)
+        ]
+
+        if not cut:
+            return regions
+
+        regions = merge_boxes(regions + cut)
+
+
+class TemplateReader(OCRReader):
+    """
+    Reader that recognizes known meme templates and reads only the regions
+    that differ from the template with reader, the rest is taken from the template.
+    Images that don't match any template are read by reader as a whole.
+    """
+
+    def __init__(self, reader: OCRReader, index: TemplateIndex):
+        self.reader = reader
+        self.index = index
+
+        # how many images were (not) read using a template,
+        # the reader is shared by the threads of the server
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def count(self, hit: bool):
+        """counts an image that was (not) read using a template"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def hit_ratio(self) -> float:
+        """returns the part of images read using a template"""
+        with self.lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0
+
+    def read(self, image: Mat) -> List[str]:
+        """reads text from image and returns the result as a list of strings separated by line"""
+        boxes = self.read_changed(image)
+        if boxes is None:
+            return self.reader.read(image)
+
+        return [box.text for box in boxes]
+
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """reads text from image and returns the lines together with their bounding boxes"""
+        boxes = self.read_changed(image)
+        if boxes is None:
+            return self.reader.read_boxes(image)
+
+        return boxes
+
+    def read_changed(self, image: Mat) -> Optional[List[TextBox]]:
+        """reads only the regions of image that differ from its template,
+        returns None if image doesn't match any template closely enough"""
+        gray = normalize(to_gray(image))
+
+        template = self.index.match(gray)
+        if template is None:
+            self.count(False)
+            return None
+
+        regions = changed_regions(template, gray)
+
+        height, width = template.gray.shape
+        changed_area = sum(region[2] * region[3] for region in regions)
+        if changed_area > MAX_CHANGED_RATIO * width * height:
+            self.count(False)
+            return None
+
+        self.count(True)
+
+        # cached text of the template lines that didn't change
+        boxes = [
+            box
+            for box in template.boxes
+            if not any(
+                intersects((box.x, box.y, box.width, box.height), region)
+                for region in regions
+            )
+        ]
+
+        # read changed regions from the original image
+        scale_x = image.shape[1] / width
+        scale_y = image.shape[0] / height
+        for (x, y, region_width, region_height) in regions:
+            left, right = int(x * scale_x), int((x + region_width) * scale_x)
+            top, bottom = int(y * scale_y), int((y + region_height) * scale_y)
+
+            for line in self.reader.read(image[top:bottom, left:right]):
+                if line:
+                    boxes.append(TextBox(x, y, region_width, region_height, line))
+
+        # reading order, lines of one region keep the order they were read in
+        return sorted(boxes, key=lambda box: (box.y, box.x))
+
+    def decode_hints(self) -> DecodeHints:
+        """the image is decoded the way the wrapped reader needs it"""
+        return self.reader.decode_hints()
+
+    def __str__(self):
+        return f"template {self.reader}"
+
+
+if __name__ == "__main__":
+    # pylint: disable=ungrouped-imports
+    import argparse
+    from src.reader import TesseractReader, EasyOCRReader
+
+    parser = argparse.ArgumentParser(description="build a meme template index")
+    parser.add_argument("templates", help="directory with template images")
+    parser.add_argument("output", help="directory to save the index to")
+    parser.add_argument("--reader", choices=["tesseract", "easyocr"], default="tesseract")
+    args = parser.parse_args()
+
+    index_reader = TesseractReader() if args.reader == "tesseract" else EasyOCRReader()
+
+    os.makedirs(args.output, exist_ok=True)
+    TemplateIndex.build(args.templates, index_reader).save(
+        os.path.join(args.output, f"{index_reader}.pickle")
+    )
@@ -6,7 +6,8 @@ from typing import List
 
 # ???
 # pylint: disable=no-name-in-module
-from cv2 import imread, getTickCount, getTickFrequency
+from cv2 import getTickCount, getTickFrequency
+from src import decode
 from src.filter import Filter
 from src.dataset import Dataset
 from src.reader import OCRReader
@@ -78,8 +79,11 @@ class TestCase:
     def test(self) -> SingleTestResult:
         """This method will test the OCR engine with filters applied."""
 
-        # load image
-        image = imread(self.image_path)
+        # load image only in the color mode and size the first step needs
+        image = decode.read(
+            self.image_path,
+            decode.pipeline_hints(self.test_settings.reader, self.test_settings.filters),
+        )
 
         # start measuring time in milliseconds
         time = getTickCount()
@@ -0,0 +1,193 @@
+"""module that limits how many CPU threads torch, OpenCV and tesseract use per worker
+and benchmarks which worker/thread split gives the best throughput"""
+import os
+from dataclasses import dataclass
+from multiprocessing import Barrier, Pool, synchronize
+from threading import BrokenBarrierError
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+# pylint: disable=no-name-in-module
+from cv2 import setNumThreads, getTickCount, getTickFrequency
+from src import decode
+from src.filter import Filter
+from src.reader import OCRReader
+
+# environment variable holding the per-worker thread budget
+THREADS_PER_WORKER_ENV = "THREADS_PER_WORKER"
+
+# how long to wait for the workers of a split to warm up (in seconds),
+# a worker whose warm-up fails is restarted by the pool over and over
+WARMUP_TIMEOUT = 300
+
+
+def get_thread_budget() -> Optional[int]:
+    """returns the per-worker thread budget from the environment,
+    or None if the libraries should keep their defaults"""
+    value = os.environ.get(THREADS_PER_WORKER_ENV)
+
+    if not value:
+        return None
+
+    try:
+        threads = int(value)
+    except ValueError as error:
+        raise ValueError(
+            f"{THREADS_PER_WORKER_ENV} must be a whole number, got {value!r}"
+        ) from error
+
+    if threads < 1:
+        raise ValueError(f"{THREADS_PER_WORKER_ENV} must be at least 1, got {threads}")
+
+    return threads
+
+
+def apply_thread_budget(threads: Optional[int] = None) -> None:
+    """limits torch, OpenCV and tesseract to the given number of threads;
+    if threads is None the budget is read from the environment"""
+    if threads is None:
+        threads = get_thread_budget()
+
+    # nothing configured, keep library defaults
+    if threads is None:
+        return
+
+    # torch (used by EasyOCR)
+    torch.set_num_threads(threads)
+
+    # OpenCV (cvtColor, resize, filter2D, ...)
+    setNumThreads(threads)
+
+    # tesseract runs as a subprocess and inherits the environment of this process
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+
+
+@dataclass
+class BenchmarkResult:
+    """This class contains the throughput of a single worker/thread split."""
+
+    workers: int
+    threads_per_worker: int
+    image_count: int
+    time: float  # in milliseconds
+
+    @property
+    def throughput(self) -> float:
+        """processed images per second"""
+        return self.image_count / (self.time / 1000)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.workers} workers x {self.threads_per_worker} threads: "
+            f"{self.throughput:.2f} images/s"
+        )
+
+
+def _init_worker(threads: int, reader: OCRReader, ready: synchronize.Barrier):
+    """applies the thread budget and warms up reader, so model loading
+    isn't part of the measured time"""
+    apply_thread_budget(threads)
+
+    reader.read(np.full((32, 32), 255, np.uint8))
+
+    # wait until all workers are warmed up
+    ready.wait()
+
+
+def _read_image(reader: OCRReader, filters: List[Filter], image_path: str) -> List[str]:
+    """loads image, applies filters and reads text from it"""
+    image = decode.read(image_path, decode.pipeline_hints(reader, filters))
+
+    for current_filter in filters:
+        image = current_filter.filter(image)
+
+    return reader.read(image)
+
+
+def default_splits(cpu_count: Optional[int] = None) -> List[tuple]:
+    """returns (workers, threads_per_worker) splits that use all cores of the machine"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+
+    return [
+        (workers, cpu_count // workers)
+        for workers in range(1, cpu_count + 1)
+        if cpu_count % workers == 0
+    ]
+
+
+def benchmark(
+    reader: OCRReader,
+    filters: List[Filter],
+    image_paths: List[str],
+    splits: Optional[List[tuple]] = None,
+    warmup_timeout: float = WARMUP_TIMEOUT,
+) -> List[BenchmarkResult]:
+    """measures the throughput of every (workers, threads_per_worker) split
+    on image_paths and returns the results"""
+    if splits is None:
+        splits = default_splits()
+
+    results: List[BenchmarkResult] = []
+    for workers, threads in splits:
+        ready = Barrier(workers + 1)
+
+        with Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(threads, reader, ready),
+        ) as pool:
+            # start measuring once every worker is warmed up
+            try:
+                ready.wait(timeout=warmup_timeout)
+            except BrokenBarrierError as error:
+                raise RuntimeError(
+                    f"workers of the {workers} workers x {threads} threads split "
+                    f"didn't warm up within {warmup_timeout} s, check that {reader} works"
+                ) from error
+            time = getTickCount()
+
+            pool.starmap(
+                _read_image, [(reader, filters, path) for path in image_paths]
+            )
+
+            time = (getTickCount() - time) / getTickFrequency() * 1000
+
+        results.append(BenchmarkResult(workers, threads, len(image_paths), time))
+
+    return results
+
+
+def recommend(results: List[BenchmarkResult]) -> BenchmarkResult:
+    """returns the split with the best throughput"""
+    return max(results, key=lambda result: result.throughput)
+
+
+if __name__ == "__main__":
+    # pylint: disable=ungrouped-imports
+    import argparse
+    from src.dataset import Dataset
+    from src.filter import NoFilter
+    from src.reader import TesseractReader, EasyOCRReader
+
+    parser = argparse.ArgumentParser(
+        description="benchmark worker count x threads per worker splits"
+    )
+    parser.add_argument("--dataset", default="./memes")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--reader", choices=["tesseract", "easyocr"], default="tesseract")
+    args = parser.parse_args()
+
+    benchmark_reader = TesseractReader() if args.reader == "tesseract" else EasyOCRReader()
+    paths = [entry.image_path for entry in Dataset(args.dataset).get(args.count)]
+
+    benchmark_results = benchmark(benchmark_reader, [NoFilter()], paths)
+    for benchmark_result in benchmark_results:
+        print(benchmark_result)
+
+    best = recommend(benchmark_results)
+    print(
+        f"recommended: {best.workers} workers with "
+        f"{THREADS_PER_WORKER_ENV}={best.threads_per_worker}"
+    )
@@ -0,0 +1,121 @@
+"""module that measures how long the stages of a request take
+and samples stacks of a thread to build flame graphs"""
+import math
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter, sleep
+from typing import List, Optional
+
+# queue times longer than this are clock errors or forged headers
+MAX_QUEUE_TIME = 24 * 60 * 60
+# how far the proxy clock may be ahead of the clock of this server
+MAX_CLOCK_SKEW = 60
+
+
+@dataclass
+class Span:
+    """This class contains the duration of a single stage of a request."""
+
+    name: str
+    duration: float  # in seconds
+
+
+@dataclass
+class Trace:
+    """This class contains the spans of a single request."""
+
+    spans: List[Span] = field(default_factory=list)
+
+    def add(self, name: str, duration: float):
+        """adds a span that was measured elsewhere"""
+        self.spans.append(Span(name, duration))
+
+    @contextmanager
+    def span(self, name: str):
+        """measures how long the body of the with statement takes"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def server_timing(self) -> str:
+        """returns the spans as a Server-Timing header value (durations in milliseconds)"""
+        return ", ".join(f"{span.name};dur={span.duration * 1000:.1f}" for span in self.spans)
+
+
+def queue_time(header: Optional[str], now: float) -> Optional[float]:
+    """returns seconds between the proxy receiving the request and now from
+    an X-Request-Start: t=<unix time> header in seconds, milliseconds or microseconds,
+    or None if the header is missing or invalid"""
+    if not header:
+        return None
+
+    try:
+        started = float(header.removeprefix("t="))
+    except ValueError:
+        return None
+
+    # the header comes from the client if there is no proxy, so don't trust it
+    if not math.isfinite(started):
+        return None
+
+    if started > 1e14:
+        started /= 1e6  # microseconds
+    elif started > 1e11:
+        started /= 1e3  # milliseconds
+
+    queued = now - started
+    if not -MAX_CLOCK_SKEW <= queued <= MAX_QUEUE_TIME:
+        return None
+
+    return max(queued, 0)
+
+
+class SamplingProfiler:
+    """
+    Profiler that periodically samples the stack of a thread from a background thread
+    and counts the stacks in the collapsed format used by flame graph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.running = False
+        self.sampler = threading.Thread(target=self.__sample, daemon=True)
+
+    def __sample(self):
+        """samples the stack of the profiled thread until stopped"""
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+            sleep(self.interval)
+
+    def start(self):
+        """starts sampling"""
+        self.running = True
+        self.sampler.start()
+
+    def stop(self):
+        """stops sampling and waits for the sampler to finish"""
+        self.running = False
+        self.sampler.join()
+
+    def save(self, path: str):
+        """saves the collapsed stacks, which can be rendered by flamegraph.pl or speedscope"""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.items():
+                file.write(f"{stack} {count}\n")
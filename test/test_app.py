@@ -0,0 +1,96 @@
+"""This module contains tests for the server."""
+
+import app as server
+from src.reader import TesseractReader
+from src.template import TemplateIndex, TemplateReader
+
+
+TEST_IMAGE_PATH = "./test/testDataset/testImage.png"
+
+
+def test_metrics():
+    """This test tests that the metrics endpoint exposes the server metrics."""
+
+    response = server.app.test_client().get("/metrics")
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert "ocr_requests_in_flight" in text
+    assert 'ocr_model_warmup_seconds{engine="tesseract"}' in text
+    assert "ocr_worker_resident_memory_bytes" in text
+
+
+def test_unauthorized_request_is_not_profiled(monkeypatch, tmp_path):
+    """This test tests that unauthorized requests neither start the profiler nor write to disk
+    and that a forged X-Request-Start header is ignored."""
+
+    monkeypatch.setattr(server, "profileSampleRate", 1)
+    monkeypatch.setattr(server, "profileDir", str(tmp_path))
+
+    response = server.app.test_client().post(
+        "/tesseract", headers={"Authorization": "wrong", "X-Request-Start": "t=inf"}
+    )
+
+    assert response.status_code == 401
+    assert "queue" not in response.headers["Server-Timing"]
+    assert not list(tmp_path.iterdir())
+
+
+def test_tesseract_returns_same_text_as_for_the_file():
+    """This test tests that the server reads the upload the same way the engine reads the file."""
+
+    with open(TEST_IMAGE_PATH, "rb") as file:
+        response = server.app.test_client().post(
+            "/tesseract",
+            headers={"Authorization": server.apiKey},
+            data={"file": (file, "testImage.png")},
+        )
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == "\n".join(TesseractReader().read(TEST_IMAGE_PATH))
+
+
+def test_authorized_request_is_traced():
+    """This test tests that a handled request returns its stages and is recorded in the metrics."""
+
+    client = server.app.test_client()
+
+    with open(TEST_IMAGE_PATH, "rb") as file:
+        response = client.post(
+            "/tesseract",
+            headers={"Authorization": server.apiKey},
+            data={"file": (file, "testImage.png")},
+        )
+
+    assert response.status_code == 200
+    stages = [span.split(";")[0] for span in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["receive", "ocr", "total"]
+
+    text = client.get("/metrics").get_data(as_text=True)
+
+    assert (
+        'ocr_request_duration_seconds_bucket{engine="tesseract",le="+Inf",stage="ocr",status="200"}'
+        in text
+    )
+    assert 'ocr_requests_total{engine="tesseract",status="200"}' in text
+
+    # the scrape itself isn't an OCR request in flight
+    assert "ocr_requests_in_flight 0" in text
+
+
+def test_decoded_request_is_traced(monkeypatch):
+    """This test tests that a request decoded by the server has a decode stage."""
+
+    index = TemplateIndex([])
+    monkeypatch.setitem(server.readers, "tesseract", TemplateReader(TesseractReader(), index))
+
+    with open(TEST_IMAGE_PATH, "rb") as file:
+        response = server.app.test_client().post(
+            "/tesseract",
+            headers={"Authorization": server.apiKey},
+            data={"file": (file, "testImage.png")},
+        )
+
+    assert response.status_code == 200
+    stages = [span.split(";")[0] for span in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["receive", "decode", "ocr", "total"]
@@ -0,0 +1,91 @@
+"""This module contains tests for the decode module."""
+
+# pylint: disable=no-name-in-module
+from cv2 import (
+    imread,
+    absdiff,
+    cvtColor,
+    COLOR_BGR2GRAY,
+    IMREAD_COLOR,
+    IMREAD_GRAYSCALE,
+    IMREAD_REDUCED_GRAYSCALE_2,
+)
+import numpy as np
+from src.decode import DecodeHints, decode_mode, jpeg_size, measure, pipeline_hints, read
+from src.filter import NoFilter, SharpenFilter, detect_text_color
+from src.reader import TesseractReader
+
+
+JPEG_PATH = "./test/testDataset/decode/testImage.jpg"  # 1620x1620
+PNG_PATH = "./test/testDataset/testImage.png"
+
+
+def test_jpeg_size():
+    """This test tests reading the size from a JPEG header."""
+
+    with open(JPEG_PATH, "rb") as file:
+        assert jpeg_size(file.read()) == (1620, 1620)
+
+    with open(PNG_PATH, "rb") as file:
+        assert jpeg_size(file.read()) is None
+
+
+def test_decode_mode():
+    """This test tests that the largest reduction still above min_side is picked."""
+
+    with open(JPEG_PATH, "rb") as file:
+        data = file.read()
+
+    assert decode_mode(data, DecodeHints()) == IMREAD_COLOR
+    assert decode_mode(data, DecodeHints(grayscale=True)) == IMREAD_GRAYSCALE
+    assert (
+        decode_mode(data, DecodeHints(grayscale=True, min_side=600))
+        == IMREAD_REDUCED_GRAYSCALE_2
+    )
+
+
+def test_read_reduced():
+    """This test tests that the image is decoded gray and reduced."""
+
+    image = read(JPEG_PATH, DecodeHints(grayscale=True, min_side=600))
+
+    assert image.shape == (810, 810)
+
+
+def test_pipeline_hints():
+    """This test tests that the first step of the pipeline decides the hints."""
+
+    reader = TesseractReader()
+
+    # without filters the reader gets the same image as from imread
+    assert pipeline_hints(reader, []) == DecodeHints()
+    assert pipeline_hints(reader, [NoFilter()]) == DecodeHints(grayscale=True, min_side=600)
+    assert pipeline_hints(reader, [SharpenFilter(), NoFilter()]) == DecodeHints(grayscale=True)
+
+
+def test_reduced_decode_is_equivalent():
+    """This test tests that the normalized image is the same with the reduced decode."""
+
+    reduced = read(JPEG_PATH, NoFilter().decode_hints())
+    full = imread(JPEG_PATH)
+
+    # the same decision whether to invert the image
+    assert detect_text_color(reduced) == detect_text_color(cvtColor(full, COLOR_BGR2GRAY))
+
+    reduced = NoFilter().filter(reduced)
+    full = NoFilter().filter(full)
+
+    assert reduced.shape == full.shape
+    assert np.mean(absdiff(reduced, full)) < 10
+
+
+def test_measure():
+    """This test tests that the reduced decode is faster and needs less memory."""
+
+    paths = [JPEG_PATH] * 5
+
+    full_time, full_memory = measure(paths, DecodeHints())
+    reduced_time, reduced_memory = measure(paths, NoFilter().decode_hints())
+
+    assert 0 < reduced_time < full_time
+    assert reduced_memory <= full_memory
@@ -0,0 +1,167 @@
+"""This module contains tests for the template module."""
+
+from typing import List
+
+# pylint: disable=no-name-in-module
+from cv2 import Mat, rectangle
+import numpy as np
+from src import decode, template as template_module
+from src.reader import OCRReader, TesseractReader, TextBox
+from src.template import (
+    Template,
+    TemplateIndex,
+    TemplateReader,
+    changed_regions,
+    difference_hash,
+    merge_boxes,
+)
+
+
+TEST_DATASET_PATH = "./test/testDataset"
+TEST_IMAGE_PATH = "./test/testDataset/testImage.png"
+
+
+class StubReader(OCRReader):
+    """reader that records the images it reads and returns a fixed caption"""
+
+    def __init__(self):
+        self.images: List[Mat] = []
+
+    def read(self, image: Mat) -> List[str]:
+        """records image and returns the caption"""
+        self.images.append(image)
+        return ["new caption"]
+
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """records image and returns the caption over the whole image"""
+        height, width = image.shape[:2]
+        return [TextBox(0, 0, width, height, line) for line in self.read(image)]
+
+    def __str__(self):
+        return "stub"
+
+
+def create_template() -> Template:
+    """creates a 600x400 template with a top and a bottom text line"""
+    gray = np.full((400, 600), 255, np.uint8)
+    rectangle(gray, (50, 30), (550, 70), 0, -1)
+    rectangle(gray, (50, 320), (550, 360), 0, -1)
+
+    return Template(
+        "test",
+        difference_hash(gray),
+        600 / 400,
+        gray,
+        [
+            TextBox(50, 30, 500, 40, "top text"),
+            TextBox(50, 320, 500, 40, "bottom text"),
+        ],
+    )
+
+
+def with_new_caption(template: Template) -> Mat:
+    """returns the template with a different top line"""
+    image = template.gray.copy()
+    rectangle(image, (50, 30), (550, 70), 255, -1)
+    rectangle(image, (100, 35), (300, 65), 0, -1)
+    return image
+
+
+def test_merge_boxes():
+    """This test tests that overlapping boxes are merged."""
+
+    boxes = merge_boxes([(0, 0, 10, 10), (20, 0, 10, 10), (5, 5, 20, 2)])
+
+    assert boxes == [(0, 0, 30, 10)]
+
+
+def test_template_reader_uses_template_text():
+    """This test tests that an image equal to a template is read from the template."""
+
+    index = TemplateIndex.build(TEST_DATASET_PATH, TesseractReader())
+    reader = TemplateReader(TesseractReader(), index)
+    image = decode.read(TEST_IMAGE_PATH)
+
+    assert index.match(index.templates[0].gray) is index.templates[0]
+    assert reader.read(image) == [box.text for box in index.templates[0].boxes]
+
+
+def test_changed_regions_ignore_noise():
+    """This test tests that a few changed pixels are not a changed region."""
+
+    template = create_template()
+    image = template.gray.copy()
+    image[200:203, 300:303] = 0
+
+    assert not changed_regions(template, image)
+
+
+def test_template_reader_reads_only_changed_caption(monkeypatch):
+    """This test tests that only the changed line is read and merged with the template text."""
+
+    monkeypatch.setattr(template_module, "MAX_HASH_DISTANCE", 64)
+    template = create_template()
+    stub = StubReader()
+    reader = TemplateReader(stub, TemplateIndex([template]))
+
+    # the changed line comes first, the unchanged one is taken from the template
+    assert reader.read(with_new_caption(template)) == ["new caption", "bottom text"]
+
+    # only the top band was read
+    assert len(stub.images) == 1
+    assert stub.images[0].shape[0] < 100
+    assert stub.images[0].shape[1] >= 500
+
+
+def test_template_reader_reads_whole_lines_next_to_changed_caption(monkeypatch):
+    """This test tests that a line touched only after growing the changed region
+    to its whole line is read as a whole too."""
+
+    monkeypatch.setattr(template_module, "MAX_HASH_DISTANCE", 64)
+    template = create_template()
+
+    # a short line diagonally next to the end of the top line
+    rectangle(template.gray, (540, 71), (590, 91), 0, -1)
+    template.boxes.append(TextBox(540, 71, 50, 20, "side text"))
+
+    # change only the start of the top line
+    image = template.gray.copy()
+    rectangle(image, (60, 35), (200, 65), 255, -1)
+
+    stub = StubReader()
+    reader = TemplateReader(stub, TemplateIndex([template]))
+
+    assert reader.read(image) == ["new caption", "bottom text"]
+
+    # the read crop contains both the whole top line and the side line
+    assert len(stub.images) == 1
+    assert stub.images[0].shape == (63, 540)
+
+
+def test_template_reader_falls_back_when_too_much_changed(monkeypatch):
+    """This test tests that an image that changed too much is read as a whole."""
+
+    monkeypatch.setattr(template_module, "MAX_HASH_DISTANCE", 64)
+    monkeypatch.setattr(template_module, "MAX_CHANGED_RATIO", 0)
+    template = create_template()
+    stub = StubReader()
+    reader = TemplateReader(stub, TemplateIndex([template]))
+    image = with_new_caption(template)
+
+    assert reader.read_changed(image) is None
+    assert reader.read(image) == ["new caption"]
+    assert stub.images[-1].shape == image.shape
+
+
+def test_template_reader_counts_hits(monkeypatch):
+    """This test tests that images read using a template are counted as hits."""
+
+    monkeypatch.setattr(template_module, "MAX_HASH_DISTANCE", 64)
+    template = create_template()
+    reader = TemplateReader(StubReader(), TemplateIndex([template]))
+
+    reader.read(with_new_caption(template))
+    reader.read(np.full((100, 600), 255, np.uint8))
+
+    assert (reader.hits, reader.misses) == (1, 1)
+    assert reader.hit_ratio() == 0.5
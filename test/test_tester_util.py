@@ -1,5 +1,8 @@
 """This module contains tests for the tester util."""
 
+# pylint: disable=no-name-in-module
+from cv2 import imread
+from src.filter import NoFilter
 from src.reader import TesseractReader
 from src.tester_util import TestCase, TestSettings, TesterUtil
 from src.dataset import Dataset
@@ -52,3 +55,19 @@ def test_test_case():
     assert result.success
     assert result.expected_text == expected_text
     assert "\n".join(result.result_text) == expected_text
+
+
+def test_test_case_with_grayscale_decode():
+    """This test tests that decoding the image in gray for a filter
+    gives the same text as decoding it in color."""
+
+    image_path = "./test/testDataset/testImage.png"
+    expected_text = TesseractReader().read(NoFilter().filter(imread(image_path)))
+
+    test_case = TestCase(
+        TestSettings(TesseractReader(), [NoFilter()]), image_path, "\n".join(expected_text)
+    )
+
+    result = test_case.test()
+
+    assert result.result_text == expected_text
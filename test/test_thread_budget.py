@@ -0,0 +1,116 @@
+"""This module contains tests for the thread budget module."""
+
+import os
+from typing import List
+
+# pylint: disable=no-name-in-module
+from cv2 import Mat, getNumThreads, setNumThreads
+import pytest
+import torch
+from src.reader import OCRReader, TextBox
+from src.thread_budget import (
+    THREADS_PER_WORKER_ENV,
+    apply_thread_budget,
+    benchmark,
+    default_splits,
+    get_thread_budget,
+    recommend,
+    BenchmarkResult,
+)
+
+
+TEST_IMAGE_PATH = "./test/testDataset/testImage.png"
+
+
+class StubReader(OCRReader):
+    """reader that doesn't read anything"""
+
+    def read(self, image: Mat) -> List[str]:
+        """returns no text"""
+        return []
+
+    def read_boxes(self, image: Mat) -> List[TextBox]:
+        """returns no text"""
+        return []
+
+    def __str__(self):
+        return "stub"
+
+
+class BrokenReader(StubReader):
+    """reader that fails like an engine that is not installed"""
+
+    def read(self, image: Mat) -> List[str]:
+        """always fails"""
+        raise OSError("engine is not installed")
+
+    def __str__(self):
+        return "broken"
+
+
+def test_apply_thread_budget(monkeypatch):
+    """This test tests that the budget is applied to every library."""
+
+    # the budget is process-wide, restore it for the other tests
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    torch_threads = torch.get_num_threads()
+    cv2_threads = getNumThreads()
+
+    try:
+        apply_thread_budget(2)
+
+        assert torch.get_num_threads() == 2
+        assert getNumThreads() == 2
+        assert os.environ["OMP_THREAD_LIMIT"] == "2"
+    finally:
+        torch.set_num_threads(torch_threads)
+        setNumThreads(cv2_threads)
+
+
+def test_get_thread_budget(monkeypatch):
+    """This test tests reading the budget from the environment."""
+
+    monkeypatch.setenv(THREADS_PER_WORKER_ENV, "3")
+    assert get_thread_budget() == 3
+
+    monkeypatch.setenv(THREADS_PER_WORKER_ENV, "")
+    assert get_thread_budget() is None
+
+    for value in ["two", "0"]:
+        monkeypatch.setenv(THREADS_PER_WORKER_ENV, value)
+        with pytest.raises(ValueError, match=THREADS_PER_WORKER_ENV):
+            get_thread_budget()
+
+
+def test_benchmark():
+    """This test tests that every split is measured."""
+
+    results = benchmark(StubReader(), [], [TEST_IMAGE_PATH] * 4, splits=[(1, 1), (2, 1)])
+
+    assert [(result.workers, result.threads_per_worker) for result in results] == [
+        (1, 1),
+        (2, 1),
+    ]
+    assert all(result.image_count == 4 and result.time > 0 for result in results)
+
+
+def test_benchmark_fails_when_warm_up_fails():
+    """This test tests that workers that can't warm up fail the benchmark instead of hanging."""
+
+    with pytest.raises(RuntimeError, match="broken"):
+        benchmark(BrokenReader(), [], [TEST_IMAGE_PATH], splits=[(1, 1)], warmup_timeout=1)
+
+
+def test_default_splits():
+    """This test tests that every split uses all cores."""
+
+    assert default_splits(4) == [(1, 4), (2, 2), (4, 1)]
+
+
+def test_recommend():
+    """This test tests that the split with the best throughput is recommended."""
+
+    slow = BenchmarkResult(1, 4, 10, 2000)
+    fast = BenchmarkResult(2, 2, 10, 1000)
+
+    assert recommend([slow, fast]) == fast
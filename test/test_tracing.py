@@ -0,0 +1,97 @@
+"""This module contains tests for the tracing and metrics modules."""
+
+import threading
+from time import sleep
+from src.metrics import Registry, Counter, Gauge, Histogram
+from src.tracing import Trace, SamplingProfiler, queue_time
+
+NOW = 1700000000.0
+
+
+def test_trace_server_timing():
+    """This test tests that spans are recorded in order."""
+
+    trace = Trace()
+    with trace.span("decode"):
+        pass
+    trace.add("ocr", 0.25)
+
+    assert [span.name for span in trace.spans] == ["decode", "ocr"]
+    assert trace.server_timing().endswith("ocr;dur=250.0")
+
+
+def test_histogram_render():
+    """This test tests the Prometheus text format of a histogram."""
+
+    registry = Registry()
+    histogram = registry.register(Histogram("duration_seconds", "duration", (0.1, 1)))
+    histogram.observe(0.5, engine="tesseract")
+
+    assert registry.render().splitlines() == [
+        "# HELP duration_seconds duration",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{engine="tesseract",le="0.1"} 0',
+        'duration_seconds_bucket{engine="tesseract",le="1"} 1',
+        'duration_seconds_bucket{engine="tesseract",le="+Inf"} 1',
+        'duration_seconds_sum{engine="tesseract"} 0.5',
+        'duration_seconds_count{engine="tesseract"} 1',
+    ]
+
+
+def test_sampling_profiler():
+    """This test tests that the profiler samples the stack of the profiled thread."""
+
+    profiler = SamplingProfiler(threading.get_ident(), interval=0.001)
+    profiler.start()
+    sleep(0.05)
+    profiler.stop()
+
+    assert any("test_sampling_profiler" in stack for stack in profiler.stacks)
+
+
+def test_queue_time():
+    """This test tests parsing X-Request-Start in seconds, milliseconds and microseconds."""
+
+    assert queue_time("t=1699999999.5", NOW) == 0.5
+    assert queue_time("t=1699999999500", NOW) == 0.5
+    assert queue_time("t=1699999999500000", NOW) == 0.5
+
+    # proxy clock slightly ahead
+    assert queue_time("t=1700000001", NOW) == 0
+
+
+def test_queue_time_rejects_invalid_headers():
+    """This test tests that missing, forged or nonsense headers are ignored."""
+
+    for header in [None, "", "t=", "t=abc", "t=inf", "t=-inf", "t=nan", "t=1e308", "t=-1e20"]:
+        assert queue_time(header, NOW) is None
+
+    # more than a day ago or far in the future
+    assert queue_time(f"t={NOW - 2 * 24 * 60 * 60}", NOW) is None
+    assert queue_time(f"t={NOW + 60 * 60}", NOW) is None
+
+
+def test_counter_and_gauge_render():
+    """This test tests the Prometheus text format of counters and gauges."""
+
+    registry = Registry()
+    counter = registry.register(Counter("requests_total", "requests"))
+    counter.inc(engine="tesseract", status=200)
+    counter.inc(engine="tesseract", status=200)
+    gauge = registry.register(Gauge("in_flight", "in flight"))
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    registry.register(Gauge("ratio", "ratio", lambda: {(("engine", 'a"b'),): 0.5}))
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total requests",
+        "# TYPE requests_total counter",
+        'requests_total{engine="tesseract",status="200"} 2',
+        "# HELP in_flight in flight",
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+        "# HELP ratio ratio",
+        "# TYPE ratio gauge",
+        'ratio{engine="a\\"b"} 0.5',
+    ]